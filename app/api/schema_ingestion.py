@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
@@ -31,9 +33,21 @@ async def ingest_schema(request: IngestRequest):
     try:
         # 1. Instantiate the service with the provided connection string
         # NOTE: We need to update SchemaIngestionService to accept this argument
-        # 2. CALL the function (add parentheses!)
-        count = schema_ingestion_service.run_ingestion(db_url=request.db_connection_string)
-        
+        # 2. Run the blocking extract/embed/upsert pipeline in a worker thread
+        count = await asyncio.to_thread(
+            schema_ingestion_service.run_ingestion,
+            db_url=request.db_connection_string
+        )
+
+        # Freshly ingested schemas must not be shadowed by cached ones —
+        # neither the retrieval-side table/semantic caches nor the
+        # formatted prompt sections built from them.
+        from app.services.db_schema.schema_retrieval import schema_retrieval_service
+        from app.services.llm.sql_generation import sql_generator
+        schema_retrieval_service.invalidate_table_cache()
+        sql_generator.invalidate_schema_cache()
+
+
         return {
             "status": "success", 
             "tables_processed": count,
@@ -26,8 +26,9 @@ async def get_schema_context(request: QueryRequest):
     Endpoint to retrieve contextualized schema based on a natural language query.
     """
     try:
-        context = schema_retrieval_service.retrieve_relevant_schema(
-            user_query=request.query, 
+        # Fully async path: batched embed + gRPC search
+        context = await schema_retrieval_service.retrieve_relevant_schema(
+            user_query=request.query,
             top_k=request.top_k
         )
         return QueryResponse(context=context)
@@ -39,7 +39,7 @@ async def generate_sql_endpoint(request: GenerateSQLRequest):
     3. LLM Generation (Gemini/Custom)
     """
     try:
-        logger.info(f"SQL Generation Request: '{request.query}' [{request.provider}]")
+        logger.info("SQL Generation Request: '%s' [%s]", request.query, request.provider)
         
         # Call the service layer
         result = await sql_generator.generate_query(
@@ -57,7 +57,7 @@ async def generate_sql_endpoint(request: GenerateSQLRequest):
 
     except ValueError as ve:
         # Graceful handling of bad provider names
-        logger.warning(f"Bad Request: {str(ve)}")
+        logger.warning("Bad Request: %s", ve)
         raise HTTPException(status_code=400, detail=str(ve))
         
     except Exception as e:
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 from app.services.sql_intents.sql_intent_loader import SQLIntentIngestionService
 from app.models.sql_intent.ingestion import (
@@ -20,7 +22,7 @@ router = APIRouter(
     "/ingest-intents",
     response_model=IntentIngestionResponse
 )
-def ingest_sql_intents(request: IntentIngestionRequest):
+async def ingest_sql_intents(request: IntentIngestionRequest):
     """
     Trigger SQL intent ingestion.
 
@@ -34,9 +36,11 @@ def ingest_sql_intents(request: IntentIngestionRequest):
             f"force={request.force} | dry_run={request.dry_run}"
         )
         
-        # Delegate ingestion to service layer (Singleton)
+        # Delegate ingestion to service layer (Singleton), keeping the
+        # blocking embed/upsert pipeline off the event loop
         intent_ingestion_service = SQLIntentIngestionService()
-        result = intent_ingestion_service.run(
+        result = await asyncio.to_thread(
+            intent_ingestion_service.run,
             dry_run=request.dry_run
         )
 
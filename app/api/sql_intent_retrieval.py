@@ -14,33 +14,37 @@ router = APIRouter(
 # POST /api/intent/classify-intent
 # -------------------------------------------------------------------
 @router.post("/classify-intent", response_model=IntentResponse)
-def classify_intent(req: IntentRequest):
+async def classify_intent(req: IntentRequest):
     """
     Classifies a natural language query into specific SQL intents.
     """
-    logger.info(f"--- Intent Classification Start: '{req.query}' ---")
-    
+    logger.info("--- Intent Classification Start: '%s' ---", req.query)
+
     # Fetch top intents (Using Singleton)
-    top_hits = intent_retrieval_service.get_top_intents(req.query, limit=5)
+    top_hits = await intent_retrieval_service.get_top_intents(req.query, limit=5)
     
     if not top_hits:
         # Logger handles timestamp and formatting automatically
-        logger.warning(f"Search returned 0 hits for query: '{req.query}'")
+        logger.warning("Search returned 0 hits for query: '%s'", req.query)
         raise HTTPException(status_code=404, detail="No matching intent found")
 
-    # Map hits to Response Model
+    # Aggregate per-text hits into one ranked entry per intent (voting)
+    ranked_intents = intent_retrieval_service.aggregate_intent_scores(top_hits)
+
+    # Map ranked intents to Response Model
     results = []
-    for hit in top_hits:
-        payload = hit["payload"]
-        score = hit["score"]
-        
+    for entry in ranked_intents:
+        payload = entry["payload"]
+        score = entry["score"]
+
         # Determine allowed operations
         operation = payload.get("operation")
         allowed_ops = [operation] if operation else ["SELECT_BASIC"]
         
-        # Build the match object
-        match_data = IntentMatch(
-            intent_id=str(payload.get("intent_id", "unknown")), 
+        # Build the match object. The fields come from our own service
+        # layer, so skip per-field validation with model_construct.
+        match_data = IntentMatch.model_construct(
+            intent_id=str(payload.get("intent_id", "unknown")),
             confidence=score,
             allowed_operations=allowed_ops,
             category=payload.get("category"),
@@ -53,12 +57,13 @@ def classify_intent(req: IntentRequest):
     if results:
         top_match = results[0]
         logger.info(
-            f"Top Match: {top_match.intent_id} | "
-            f"Conf: {top_match.confidence:.4f} | "
-            f"Op: {top_match.allowed_operations[0]}"
+            "Top Match: %s | Conf: %.4f | Op: %s",
+            top_match.intent_id,
+            top_match.confidence,
+            top_match.allowed_operations[0]
         )
 
-    return IntentResponse(
+    return IntentResponse.model_construct(
         query=req.query,
         matches=results
     )
\ No newline at end of file
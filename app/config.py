@@ -21,16 +21,93 @@ class Settings:
     # If using local Docker, URL might be 'http://localhost:6333' and Key is None.
     QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
-    
+
+    # Transport tuning for the request-path (async) client.
+    # gRPC avoids REST serialization overhead; the pool size controls how many
+    # concurrent in-flight searches the channel can serve.
+    QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+    QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", 100))
+    QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 60))
+
     COLLECTION_NAME = os.getenv("COLLECTION_NAME", "sql_intents")
+
+    # Bulk-ingestion upload tuning: points per network batch and number of
+    # parallel upload workers used by client.upload_points.
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))
+    INGEST_PARALLEL = int(os.getenv("INGEST_PARALLEL", 4))
+
+    # In-process intent search: the intent corpus is a few hundred vectors,
+    # so a numpy dot product beats a Qdrant round trip. The snapshot is
+    # pulled from Qdrant, refreshed every TTL seconds, and skipped (with
+    # fallback to Qdrant) if the collection outgrows the max size.
+    INTENT_INMEMORY_SEARCH = os.getenv("INTENT_INMEMORY_SEARCH", "true").lower() == "true"
+    INTENT_INMEMORY_MAX_POINTS = int(os.getenv("INTENT_INMEMORY_MAX_POINTS", 10000))
+    INTENT_INMEMORY_TTL = int(os.getenv("INTENT_INMEMORY_TTL", 300))
+
+    # Minimum aggregated score for an intent to be returned from voting.
+    # 0.0 keeps every candidate (current behaviour); raise to drop
+    # low-confidence matches without an extra post-processing step.
+    INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", 0.0))
     DB_COLLECTION_NAME = os.getenv("DB_COLLECTION_NAME", "db_schemas")
+
+    # Semantic cache for schema retrieval: queries whose embeddings land
+    # within the similarity threshold of a previously answered query reuse
+    # its formatted context, skipping the Qdrant search and parent-table
+    # lookups entirely. Vectors are pre-normalized, so similarity is a dot
+    # product. 0.97 only matches near-identical phrasings.
+    SCHEMA_SEMANTIC_CACHE = os.getenv("SCHEMA_SEMANTIC_CACHE", "true").lower() == "true"
+    SCHEMA_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SCHEMA_SEMANTIC_CACHE_THRESHOLD", 0.97))
+    SCHEMA_SEMANTIC_CACHE_CAPACITY = int(os.getenv("SCHEMA_SEMANTIC_CACHE_CAPACITY", 4096))
+
+    # Schema extraction table filters (regex, matched against table_name).
+    # Empty include = everything; the default exclude drops migration
+    # bookkeeping tables that waste embeddings and payload space.
+    TABLE_INCLUDE_REGEX = os.getenv("TABLE_INCLUDE_REGEX", "")
+    TABLE_EXCLUDE_REGEX = os.getenv(
+        "TABLE_EXCLUDE_REGEX",
+        r"^(alembic_version|django_migrations|schema_migrations|flyway_schema_history)$"
+    )
     VECTOR_SIZE = int(os.getenv("VECTOR_SIZE", 384))
 
+    # Distance metric for newly created collections. Embeddings are
+    # L2-normalized at encode time, so "dot" is equivalent to cosine but
+    # skips Qdrant's per-comparison normalization. Deployments whose
+    # collections predate normalized vectors can pin "cosine" instead of
+    # recreating them.
+    VECTOR_DISTANCE = os.getenv("VECTOR_DISTANCE", "dot").lower()
+
     # =========================================================================
     # 3. MODEL SETTINGS
     # =========================================================================
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
 
+    # Device for the embedding model. Empty = auto-detect (cuda > mps >
+    # cpu); set explicitly to pin inference to a device.
+    SENTENCE_TRANSFORMER_DEVICE = os.getenv("SENTENCE_TRANSFORMER_DEVICE", "")
+
+    # Inference backend for sentence-transformers: "torch" (default),
+    # "onnx", or "openvino". ONNX Runtime with the int8-quantized export
+    # is typically 2-4x faster for MiniLM on CPU-only hosts; it requires
+    # the sentence-transformers[onnx] extra to be installed.
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+    # Max number of query embeddings kept in the in-process LRU cache
+    EMBEDDING_CACHE_CAPACITY = int(os.getenv("EMBEDDING_CACHE_CAPACITY", 10000))
+
+    # Token budget per encode call. Queries and intent texts are short;
+    # 128 leaves headroom for the longer table-summary texts.
+    EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", 128))
+
+    # Optional on-disk embedding cache directory. When set, batch_embed
+    # stores each vector keyed by a hash of the normalized text, so
+    # re-ingestion only embeds texts that actually changed. Empty = off.
+    EMBEDDING_DISK_CACHE_DIR = os.getenv("EMBEDDING_DISK_CACHE_DIR", "")
+
+    # Micro-batching of concurrent query embeddings: how many requests to
+    # coalesce into one forward pass, and how long to wait for stragglers.
+    EMBEDDING_MICROBATCH_SIZE = int(os.getenv("EMBEDDING_MICROBATCH_SIZE", 32))
+    EMBEDDING_MICROBATCH_WAIT_MS = float(os.getenv("EMBEDDING_MICROBATCH_WAIT_MS", 10))
+
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
     CUSTOM_LLM_URL = os.getenv("CUSTOM_LLM_URL", "")
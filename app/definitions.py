@@ -1,4 +1,6 @@
-SQL_INTENTS = [
+# Frozen at import: the registry is read-only reference data, and a tuple
+# both signals that and iterates slightly faster than a list.
+SQL_INTENTS = (
     # =========================================================================
     # 100 SERIES: BASIC READS & FORMATTING
     # =========================================================================
@@ -387,4 +389,15 @@ SQL_INTENTS = [
             "clean up specific data"
         ]
     }
-]
\ No newline at end of file
+)
+
+# Canonicalize keywords once at import: strip/lowercase and dedupe so
+# near-identical variants ("show", "SHOW ") don't each cost an embedding
+# and a vector point. Descriptions, examples and paraphrases are left
+# untouched — casing and phrasing carry signal there.
+for _intent in SQL_INTENTS:
+    _intent["keywords"] = list(dict.fromkeys(
+        cleaned for kw in _intent.get("keywords", [])
+        if (cleaned := kw.strip().lower())
+    ))
+del _intent
@@ -1,5 +1,6 @@
 # FastAPI entry point\
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.api.sql_intent_retrieval import router
 from app.api.sql_intent_ingestion import router as ingestion_router
 from app.api.schema_ingestion import router as schema_ingestion_router
@@ -15,7 +16,46 @@ dictConfig(log_cfg.get_dict_config())
 
 
 # Now the logger is ready to be used anywhere
-app = FastAPI(title="SQL Intent Classification Service")
+# ORJSONResponse: orjson serializes float-heavy/nested payloads several
+# times faster than stdlib json and emits bytes directly.
+app = FastAPI(
+    title="SQL Intent Classification Service",
+    default_response_class=ORJSONResponse
+)
+
+@app.on_event("startup")
+def warm_up_embedding_model():
+    # Pay the model load + first-encode warmup cost at boot,
+    # not on the first /classify-intent request.
+    from app.services.embedding.embedding import embedding_service
+    embedding_service.warm_up()
+
+@app.on_event("startup")
+async def warm_up_qdrant_channel():
+    # Open the shared gRPC channel (TCP + TLS + HTTP/2 setup) at boot so
+    # the first search doesn't pay connection establishment. The clients
+    # are module-level singletons reused by every request.
+    from app.vectorstore.qdrant_client import async_client
+    from app.utils.logging_util import logger
+    try:
+        await async_client.get_collections()
+        logger.info("✅ Qdrant channel warmed up.")
+    except Exception as e:
+        # Warmup is best-effort: Qdrant may come up after the API does.
+        logger.warning("Qdrant warmup failed (will connect lazily): %s", e)
+
+@app.on_event("shutdown")
+async def close_qdrant_clients():
+    # Release the shared gRPC channel/connection pool cleanly
+    from app.vectorstore.qdrant_client import client, async_client
+    await async_client.close()
+    client.close()
+
+@app.on_event("shutdown")
+def close_db_pools():
+    # Drop the per-URL Postgres connection pools used by schema ingestion
+    from app.services.db_schema.schema_extractor import close_pools
+    close_pools()
 
 app.include_router(router)
 app.include_router(ingestion_router)
@@ -1,8 +1,48 @@
+import itertools
+import re
+import threading
+from collections import defaultdict
+
 import psycopg2
+from psycopg2 import pool as pg_pool
 from typing import Iterator, Dict, List
 from app.config import settings
 from app.utils.logging_util import logger
 
+# ---------------------------------------------------------
+# CONNECTION POOLS (one per database URL)
+# ---------------------------------------------------------
+# run_ingestion builds a fresh SchemaExtractor per request, and opening a
+# new Postgres connection each time (TCP + TLS + auth) dominates latency
+# for small schemas. Pools are keyed by connection string and shared
+# across requests; the oldest pool is closed once the registry fills so
+# stale URLs don't accumulate connections.
+_POOLS: Dict[str, pg_pool.ThreadedConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+_MAX_POOLS = 16
+
+
+def _get_pool(conn_str: str) -> pg_pool.ThreadedConnectionPool:
+    with _POOLS_LOCK:
+        existing = _POOLS.get(conn_str)
+        if existing is not None:
+            return existing
+        if len(_POOLS) >= _MAX_POOLS:
+            oldest_url = next(iter(_POOLS))
+            _POOLS.pop(oldest_url).closeall()
+        created = pg_pool.ThreadedConnectionPool(minconn=0, maxconn=5, dsn=conn_str)
+        _POOLS[conn_str] = created
+        return created
+
+
+def close_pools():
+    """Closes every pooled connection; call on service shutdown."""
+    with _POOLS_LOCK:
+        for p in _POOLS.values():
+            p.closeall()
+        _POOLS.clear()
+
+
 class SchemaExtractor:
     def __init__(self, db_url: str = None):
         self.conn_str = db_url if db_url else settings.DB_URL
@@ -10,118 +50,159 @@ class SchemaExtractor:
         # Focus sampling on strings/categories
         self.categorical_types = {'character varying', 'varchar', 'text', 'char'}
         self.sample_limit = 10
+        # Max rows the sampling fallback will read from any one table
+        self.scan_row_cap = 10000
         # Skip sampling if a column is likely a Primary Key or Unique ID
         self.skip_keywords = {'id', 'uuid', 'guid', 'pk', 'fk', 'hash'}
+        # Table name filters: embedding migration/audit tables wastes
+        # encode time and payload space in Qdrant.
+        self.include_re = re.compile(settings.TABLE_INCLUDE_REGEX) if settings.TABLE_INCLUDE_REGEX else None
+        self.exclude_re = re.compile(settings.TABLE_EXCLUDE_REGEX) if settings.TABLE_EXCLUDE_REGEX else None
+
+    def _table_included(self, table_name: str) -> bool:
+        if self.include_re and not self.include_re.search(table_name):
+            return False
+        if self.exclude_re and self.exclude_re.search(table_name):
+            return False
+        return True
 
-    def _get_smart_samples(self, cursor, table_name: str, column_name: str) -> List[str]:
+    def _get_table_samples(self, cursor, table_name: str, columns: List[str]) -> Dict[str, List[str]]:
         """
-        Tiered sampling: 
-        1. pg_stats (Instant/No Load)
-        2. TABLESAMPLE BERNOULLI (Medium/Large Tables)
-        3. Standard SELECT DISTINCT (Small Tables Fallback)
+        Tiered sampling for ALL categorical columns of one table at once:
+        1. pg_stats for every column in one query (Instant/No Load)
+        2. One row-capped aggregate scan covering the columns pg_stats
+           had nothing for
+
+        Replaces the old per-column version, which cost up to three
+        round-trips per column — O(columns) → O(1) queries per table.
         """
-        if any(key in column_name.lower() for key in self.skip_keywords):
-            return []
+        wanted = [
+            col for col in columns
+            if not any(key in col.lower() for key in self.skip_keywords)
+        ]
+        if not wanted:
+            return {}
 
+        samples: Dict[str, List[str]] = {}
         try:
-            # --- TIER 1: pg_stats (Internal Metadata) ---
+            # --- TIER 1: pg_stats (Internal Metadata), all columns at once ---
             cursor.execute("""
-                SELECT most_common_vals::text 
-                FROM pg_stats 
-                WHERE schemaname = %s AND tablename = %s AND attname = %s;
-            """, (self.schema, table_name, column_name))
-            
-            stats = cursor.fetchone()
-            if stats and stats[0]:
-                raw_vals = stats[0].strip("{}").split(",")
-                return [v.strip('"') for v in raw_vals[:self.sample_limit]]
-
-            # --- TIER 2: Check Table Size ---
-            # We fetch the estimated row count to decide if we should use sampling
-            cursor.execute("""
-                SELECT reltuples AS estimate 
-                FROM pg_class c 
-                JOIN pg_namespace n ON n.oid = c.relnamespace 
-                WHERE n.nspname = %s AND c.relname = %s;
-            """, (self.schema, table_name))
-            row_count_estimate = cursor.fetchone()[0]
-
-            # --- TIER 3: Adaptive Selection ---
-            if row_count_estimate > 1000:
-                # Use BERNOULLI (row-level sampling) for large tables. 
-                # It's slower than SYSTEM but works on small/medium tables too.
-                query = f"""
-                    SELECT DISTINCT "{column_name}" 
-                    FROM "{self.schema}"."{table_name}" TABLESAMPLE BERNOULLI (10)
-                    WHERE "{column_name}" IS NOT NULL 
-                    LIMIT %s;
-                """
-            else:
-                # Standard scan for small tables (like your 10-row sample)
-                query = f"""
-                    SELECT DISTINCT "{column_name}" 
-                    FROM "{self.schema}"."{table_name}"
-                    WHERE "{column_name}" IS NOT NULL 
-                    LIMIT %s;
-                """
-
-            cursor.execute(query, (self.sample_limit,))
-            return [str(row[0]) for row in cursor.fetchall()]
+                SELECT attname, most_common_vals::text
+                FROM pg_stats
+                WHERE schemaname = %s AND tablename = %s AND attname = ANY(%s);
+            """, (self.schema, table_name, wanted))
+
+            for attname, stats in cursor.fetchall():
+                if stats:
+                    raw_vals = stats.strip("{}").split(",")
+                    samples[attname] = [v.strip('"') for v in raw_vals[:self.sample_limit]]
+
+            missing = [col for col in wanted if col not in samples]
+            if not missing:
+                return samples
+
+            # --- TIER 2: One bounded aggregate scan for the rest ---
+            # No pg_class row-estimate round-trip: a LIMIT'ed subquery
+            # caps the rows read regardless of table size, which is
+            # cheaper than the estimate query itself on the common
+            # small-table case. array_agg DISTINCT per column collects
+            # every sample set in that single pass.
+            col_list = ", ".join(f'"{col}"' for col in missing)
+            agg_exprs = ", ".join(
+                f'(array_agg(DISTINCT "{col}") FILTER (WHERE "{col}" IS NOT NULL))'
+                f'[1:{self.sample_limit}]'
+                for col in missing
+            )
+            cursor.execute(
+                f'SELECT {agg_exprs} FROM '
+                f'(SELECT {col_list} FROM "{self.schema}"."{table_name}" '
+                f'LIMIT {self.scan_row_cap}) s;'
+            )
+            row = cursor.fetchone() or ()
+            for col, vals in zip(missing, row):
+                samples[col] = [str(v) for v in (vals or [])]
 
         except Exception as e:
-            logger.warning(f"Sampling failed for {table_name}.{column_name}: {e}")
-            return []
+            logger.warning("Sampling failed for %s: %s", table_name, e)
+
+        return samples
         
     def extract_schema_generator(self) -> Iterator[Dict]:
         conn = None
+        pool = _get_pool(self.conn_str)
         try:
-            conn = psycopg2.connect(self.conn_str)
+            conn = pool.getconn()
             cursor = conn.cursor()
 
-            # Fetch tables and descriptions
+            # One query for ALL columns, grouped in Python — instead of the
+            # old N+1 pattern issuing one columns query per table.
+            cursor.execute("""
+                SELECT table_name, column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = %s
+                ORDER BY table_name, ordinal_position;
+            """, (self.schema,))
+            columns_by_table = {
+                t_name: [(col, dtype) for _, col, dtype in group]
+                for t_name, group in itertools.groupby(cursor.fetchall(), key=lambda r: r[0])
+            }
+
+            # One query for ALL foreign keys, same idea
             cursor.execute("""
+                SELECT tc.table_name, kcu.column_name, ccu.table_name
+                FROM information_schema.table_constraints tc
+                JOIN information_schema.key_column_usage kcu ON tc.constraint_name = kcu.constraint_name
+                JOIN information_schema.constraint_column_usage ccu ON ccu.constraint_name = tc.constraint_name
+                WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = %s;
+            """, (self.schema,))
+            fks_by_table = defaultdict(list)
+            for t_name, col_name, foreign_table in cursor.fetchall():
+                fks_by_table[t_name].append({"col": col_name, "foreign_table": foreign_table})
+
+            # Named (server-side) cursor streams tables instead of
+            # materializing the whole list, so downstream embedding can
+            # start on the first batch and memory stays flat on schemas
+            # with thousands of tables.
+            tables_cursor = conn.cursor(name="schema_tables_cur")
+            tables_cursor.itersize = 200
+            tables_cursor.execute("""
                 SELECT table_name, obj_description(quote_ident(table_name)::regclass)
                 FROM information_schema.tables
                 WHERE table_schema = %s AND table_type = 'BASE TABLE';
             """, (self.schema,))
-            tables = cursor.fetchall()
-
-            for table_name, table_comment in tables:
-                cursor.execute("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_name = %s AND table_schema = %s;
-                """, (table_name, self.schema))
-                raw_columns = cursor.fetchall()
-                
-                columns = []
-                for col_name, data_type in raw_columns:
-                    samples = []
-                    if data_type in self.categorical_types:
-                        # Use the smart sampling method
-                        samples = self._get_smart_samples(cursor, table_name, col_name)
-                    
-                    columns.append({
+
+            for table_name, table_comment in tables_cursor:
+                if not self._table_included(table_name):
+                    continue
+
+                table_columns = columns_by_table.get(table_name, [])
+
+                # One batched sampling pass for the categorical columns
+                samples_by_col = self._get_table_samples(
+                    cursor, table_name,
+                    [col for col, dtype in table_columns
+                     if dtype in self.categorical_types]
+                )
+
+                columns = [
+                    {
                         "name": col_name,
                         "type": data_type,
-                        "samples": samples
-                    })
-
-                # Fetch foreign keys (relationships)
-                cursor.execute("""
-                    SELECT kcu.column_name, ccu.table_name
-                    FROM information_schema.table_constraints tc
-                    JOIN information_schema.key_column_usage kcu ON tc.constraint_name = kcu.constraint_name
-                    JOIN information_schema.constraint_column_usage ccu ON ccu.constraint_name = tc.constraint_name
-                    WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = %s AND tc.table_name = %s;
-                """, (self.schema, table_name))
-                
+                        "samples": samples_by_col.get(col_name, [])
+                    }
+                    for col_name, data_type in table_columns
+                ]
+
                 yield {
                     "table_name": table_name,
                     "description": table_comment or "",
                     "columns": columns,
-                    "foreign_keys": [{"col": row[0], "foreign_table": row[1]} for row in cursor.fetchall()]
+                    "foreign_keys": fks_by_table.get(table_name, [])
                 }
 
         finally:
-            if conn: conn.close()
\ No newline at end of file
+            if conn:
+                # rollback clears any open server-side cursor/txn state so
+                # the connection goes back to the pool clean.
+                conn.rollback()
+                pool.putconn(conn)
\ No newline at end of file
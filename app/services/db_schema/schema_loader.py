@@ -1,14 +1,33 @@
 import uuid
 import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, Iterable, List
-from qdrant_client.models import PointStruct, VectorParams, Distance, PayloadSchemaType
+from qdrant_client.models import (
+    PointStruct,
+    VectorParams,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+)
 
 # Project Imports
 from app.config import settings
-from app.vectorstore.qdrant_client import client as qdrant_client
+from app.vectorstore.qdrant_client import client as qdrant_client, vector_distance
 from app.services.db_schema.schema_extractor import SchemaExtractor 
 from app.services.embedding.embedding import embedding_service  # <--- Use your singleton!
-from app.utils.logging_util import logger 
+from app.utils.logging_util import logger
+
+# Hoisted namespace + memoized uuid5: the parent-table id is recomputed
+# for every column point, so one MD5 hash per unique name is enough.
+_NS = uuid.NAMESPACE_DNS
+
+@lru_cache(maxsize=4096)
+def _point_id(name: str) -> str:
+    return str(uuid.uuid5(_NS, name))
 
 class SchemaIngestionService:
     def __init__(self):
@@ -22,7 +41,7 @@ class SchemaIngestionService:
         # 2. Use the Singleton Qdrant Client
         self.client = qdrant_client
         
-        self.batch_size = 25 
+        self.batch_size = 64
         
         # 3. Ensure Collection exists on startup (Safe to call multiple times)
         self._ensure_collection(settings.DB_COLLECTION_NAME)
@@ -36,20 +55,47 @@ class SchemaIngestionService:
             if collection_name not in existing_names:
                 self.client.create_collection(
                     collection_name=collection_name,
-                    vectors_config=VectorParams(size=settings.VECTOR_SIZE, distance=Distance.COSINE),
+                    # Dot product on pre-normalized vectors (see EmbeddingService)
+                    # on_disk=False: schemas are small-to-mid sized, so the
+                    # originals stay in RAM instead of paying mmap faults.
+                    vectors_config=VectorParams(
+                        size=settings.VECTOR_SIZE,
+                        distance=vector_distance(),
+                        on_disk=False
+                    ),
+                    # HNSW graph pinned in RAM; on-disk graphs push query
+                    # latency into the seconds range at hnsw_ef this low.
+                    hnsw_config=HnswConfigDiff(m=16, ef_construct=128, on_disk=False),
+                    # Payloads are read on every hit (full_schema), keep
+                    # them resident too.
+                    on_disk_payload=False,
+                    # int8 scalar quantization, same rationale as the intent collection
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
+                    )
                 )
 
-            # Create keyword indexes for efficient filtering during retrieval
+            # Create keyword indexes for efficient filtering during
+            # retrieval — but only the ones not already present, so warm
+            # startups don't pay two redundant round-trips.
+            info = self.client.get_collection(collection_name)
+            existing_indexes = set((info.payload_schema or {}).keys())
             for field in ["type", "table_name"]:
-                self.client.create_payload_index(
-                    collection_name=collection_name,
-                    field_name=field,
-                    field_schema=PayloadSchemaType.KEYWORD,
-                )
-            
-            logger.info(f"✅ Collection and indexes ready on {collection_name}")
+                if field not in existing_indexes:
+                    self.client.create_payload_index(
+                        collection_name=collection_name,
+                        field_name=field,
+                        field_schema=PayloadSchemaType.KEYWORD,
+                    )
+
+
+            logger.info("✅ Collection and indexes ready on %s", collection_name)
         except Exception as e:
-            logger.error(f"Failed to ensure collection or indexes: {e}")
+            logger.error("Failed to ensure collection or indexes: %s", e)
             raise
 
     def _generate_table_text(self, table: Dict) -> str:
@@ -65,11 +111,17 @@ class SchemaIngestionService:
         return text
 
     def _generate_column_text(self, table_name: str, column: Dict) -> str:
-        """Contextualized text for the Column-level node."""
-        text = f"Table: {table_name}, Column: {column['name']} (Type: {column['type']})"
+        """
+        Contextualized text for the Column-level node.
+
+        Compact form: the table context is kept (it carries retrieval
+        signal) but trimmed to the minimum tokens, since this prefix is
+        re-encoded for every column of the table.
+        """
+        text = f"{table_name} column {column['name']} ({column['type']})"
         if column.get('samples'):
             samples_str = ", ".join(column['samples'])
-            text += f". Example values: {samples_str}"
+            text += f". values: {samples_str}"
         return text
 
     def _batch_iterator(self, iterable: Iterable, size: int):
@@ -96,88 +148,151 @@ class SchemaIngestionService:
         extractor = SchemaExtractor(db_url=db_url)
         
         table_generator = extractor.extract_schema_generator()
+
+        # One background worker pipelines Qdrant upserts behind embedding
+        uploader = ThreadPoolExecutor(max_workers=1)
+
+        # Defer HNSW indexing for the bulk load; the graph is built once
+        # in the background when the threshold is restored below.
+        self.client.update_collection(
+            collection_name=settings.DB_COLLECTION_NAME,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            total_tables, total_points = self._ingest_batches(
+                table_generator, uploader
+            )
+        finally:
+            uploader.shutdown(wait=True)
+            self.client.update_collection(
+                collection_name=settings.DB_COLLECTION_NAME,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=20000)
+            )
+
+        logger.info("🎉 Ingestion Finished. Tables: %d, Total Nodes: %d", total_tables, total_points)
+        return total_tables
+
+    def _ingest_batches(self, table_generator, uploader) -> tuple:
+        """Embeds and upserts table batches; returns (tables, points) counts."""
         total_tables = 0
         total_points = 0
+        pending_upload = None
 
         # 2. Process in batches
         for batch in self._batch_iterator(table_generator, self.batch_size):
-            points = []
-            
             # --- PRE-CALCULATE TEXTS FOR BATCH EMBEDDING ---
-            # To optimize performance, we gather all texts first and embed them in one go
-            # rather than calling .encode() one by one inside the loop.
-            texts_to_embed = []
-            metadata_map = [] # Keeps track of what each text belongs to
-            
+            # Two typed entry lists instead of a per-node metadata dict:
+            # the construction loops below stay branch-free and nothing
+            # allocates a {"type": ...} wrapper per point.
+            table_entries = []  # (table_name, table_dict, text)
+            col_entries = []    # (parent_table_name, col_dict, text)
+
             for table in batch:
-                # Prepare Table Text
-                t_text = self._generate_table_text(table)
-                texts_to_embed.append(t_text)
-                metadata_map.append({"type": "table", "data": table})
-                
-                # Prepare Column Texts
+                t_name = table['table_name']
+                table_entries.append(
+                    (t_name, table, self._generate_table_text(table))
+                )
                 for col in table['columns']:
-                    c_text = self._generate_column_text(table['table_name'], col)
-                    texts_to_embed.append(c_text)
-                    metadata_map.append({"type": "column", "data": col, "parent_table": table['table_name']})
+                    col_entries.append(
+                        (t_name, col, self._generate_column_text(t_name, col))
+                    )
+
+            texts_to_embed = [entry[2] for entry in table_entries]
+            texts_to_embed += [entry[2] for entry in col_entries]
 
             # --- BATCH EMBEDDING CALL ---
-            vectors = self.embedding_service.batch_embed(texts_to_embed)
-            
+            # Dedupe first: schemas repeat column shapes (created_at,
+            # status, ...) so identical texts should cost one forward pass.
+            unique_texts = list(dict.fromkeys(texts_to_embed))
+            unique_vectors = self.embedding_service.batch_embed(unique_texts)
+            vector_by_text = dict(zip(unique_texts, unique_vectors))
+            vectors = [vector_by_text[t] for t in texts_to_embed]
+
             # --- CONSTRUCT POINTS ---
-            for i, vector in enumerate(vectors):
-                meta = metadata_map[i]
-                
-                if meta["type"] == "table":
-                    table = meta["data"]
-                    t_name = table['table_name']
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"tbl_{t_name}"))
-                    
-                    points.append(PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload={
-                            "type": "table",
-                            "table_name": t_name,
-                            "schema_text": texts_to_embed[i],
-                            "full_schema": table 
-                        }
-                    ))
-                    total_tables += 1
-                    
-                elif meta["type"] == "column":
-                    col = meta["data"]
-                    t_name = meta["parent_table"]
-                    point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"col_{t_name}_{col['name']}"))
-                    parent_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"tbl_{t_name}"))
-                    
-                    points.append(PointStruct(
-                        id=point_id,
-                        vector=vector,
-                        payload={
-                            "type": "column",
-                            "table_name": t_name,
-                            "column_name": col['name'],
-                            "context_text": texts_to_embed[i],
-                            "parent_table_id": parent_id,
-                            "samples": col.get('samples', [])
-                        }
-                    ))
-
-            # --- UPSERT ---
+            points = []
+            table_vectors = vectors[:len(table_entries)]
+            col_vectors = vectors[len(table_entries):]
+
+            for (t_name, table, text), vector in zip(table_entries, table_vectors):
+                # Samples live on the column points; storing them again
+                # inside full_schema multiplied payload bytes for data
+                # the retriever never reads from the table point.
+                slim_schema = {
+                    **table,
+                    "columns": [
+                        {"name": c["name"], "type": c["type"]}
+                        for c in table["columns"]
+                    ]
+                }
+                points.append(PointStruct(
+                    id=_point_id(f"tbl_{t_name}"),
+                    vector=vector,
+                    payload={
+                        "type": "table",
+                        "table_name": t_name,
+                        "schema_text": text,
+                        "full_schema": slim_schema
+                    }
+                ))
+            total_tables += len(table_entries)
+
+            for (t_name, col, _), vector in zip(col_entries, col_vectors):
+                # Minimal payload: the retriever only filters on these
+                # keys. context_text is derivable from the rest, so
+                # storing it per point was pure write amplification.
+                # Samples stay here — this is their only home now that
+                # the table payload no longer duplicates them.
+                points.append(PointStruct(
+                    id=_point_id(f"col_{t_name}_{col['name']}"),
+                    vector=vector,
+                    payload={
+                        "type": "column",
+                        "table_name": t_name,
+                        "column_name": col['name'],
+                        "parent_table_id": _point_id(f"tbl_{t_name}"),
+                        "samples": col.get('samples', [])
+                    }
+                ))
+
+            # --- UPSERT (overlapped with the next batch's encoding) ---
+            # Ship the batch on the uploader thread so the transformer can
+            # start on batch N+1 while batch N is in flight. Waiting on the
+            # previous future first keeps at most one batch queued.
             if points:
-                try:
-                    self.client.upsert(
-                        collection_name=settings.DB_COLLECTION_NAME,
-                        points=points
-                    )
-                    total_points += len(points)
-                    logger.info(f"✅ Batch upserted: {len(points)} nodes.")
-                except Exception as e:
-                    logger.error(f"❌ Batch upsert failed: {e}")
+                if pending_upload is not None:
+                    total_points += pending_upload.result()
+                pending_upload = uploader.submit(self._upsert_batch, points)
 
-        logger.info(f"🎉 Ingestion Finished. Tables: {total_tables}, Total Nodes: {total_points}")
-        return total_tables
+        if pending_upload is not None:
+            total_points += pending_upload.result()
+
+        return total_tables, total_points
+
+    def _upsert_batch(self, points: List[PointStruct]) -> int:
+        """Ships one batch of points; returns how many were handed off."""
+        try:
+            # upload_points slices the (table-count × columns) batch into
+            # network chunks with retries, instead of one monolithic
+            # blocking upsert. parallel=1 on purpose: parallel>1 forks a
+            # fresh multiprocessing pool (each worker building its own
+            # client) per 64-table batch to ship a handful of chunks —
+            # slower than serial at this size, and forking a threaded
+            # uvicorn process with torch loaded is hazardous. The
+            # dedicated uploader thread already overlaps this call with
+            # the next batch's encoding.
+            self.client.upload_points(
+                collection_name=settings.DB_COLLECTION_NAME,
+                points=points,
+                batch_size=settings.INGEST_BATCH_SIZE,
+                parallel=1,
+                max_retries=3,
+                wait=False
+            )
+            logger.info("✅ Batch uploaded: %d nodes.", len(points))
+            return len(points)
+        except Exception as e:
+            logger.error("❌ Batch upload failed: %s", e)
+            return 0
 
 # ---------------------------------------------------------
 # SINGLETON INSTANCE
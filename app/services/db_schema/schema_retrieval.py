@@ -1,52 +1,162 @@
-from typing import List, Dict, Any
-from app.vectorstore.qdrant_client import client as qdrant_client
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.vectorstore.qdrant_client import async_client
 from app.config import settings
 from app.utils.logging_util import logger
-from sentence_transformers import SentenceTransformer
+from app.services.embedding.batcher import embedding_batcher
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    SearchParams,
+    QuantizationSearchParams,
+)
+
+class SemanticCache:
+    """
+    Query-level semantic cache over formatted retrieval results.
+
+    Query distributions are heavy-tailed: the same questions (modulo
+    phrasing) recur constantly. Embeddings are pre-normalized (see
+    EmbeddingService), so one numpy dot product against the cached query
+    vectors finds the nearest previous query; above the similarity
+    threshold its formatted schema context is reused and the whole Qdrant
+    search + parent-table path is skipped — the same brute-force trick
+    InMemoryIntentIndex uses for the intent corpus.
+
+    Entries live in a preallocated ring buffer, so at capacity the oldest
+    cached queries are overwritten first.
+    """
+
+    def __init__(self, capacity: int = None, threshold: float = None):
+        self.capacity = capacity or settings.SCHEMA_SEMANTIC_CACHE_CAPACITY
+        self.threshold = threshold if threshold is not None else settings.SCHEMA_SEMANTIC_CACHE_THRESHOLD
+        self._matrix = np.zeros((self.capacity, settings.VECTOR_SIZE), dtype=np.float32)
+        self._results: List[Any] = [None] * self.capacity
+        self._count = 0
+        self._write_pos = 0
+
+    def lookup(self, query_vector: np.ndarray) -> Optional[Any]:
+        """Returns the cached result nearest to query_vector, or None."""
+        if self._count == 0:
+            return None
+        scores = self._matrix[:self._count] @ np.asarray(query_vector, dtype=np.float32)
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self._results[best]
+        return None
+
+    def insert(self, query_vector: np.ndarray, result: Any):
+        self._matrix[self._write_pos] = query_vector
+        self._results[self._write_pos] = result
+        self._write_pos = (self._write_pos + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._count = 0
+        self._write_pos = 0
+
 
 class SchemaRetrievalService:
     def __init__(self):
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
         self.collection_name = settings.DB_COLLECTION_NAME
-
-    def _get_table_by_name(self, table_name: str) -> Dict:
+        # Built once: restricts search to the indexed node types so the
+        # planner can prune, and future point kinds don't leak into results.
+        self._type_filter = Filter(must=[
+            FieldCondition(key="type", match=MatchAny(any=["table", "column"]))
+        ])
+        # Process-lifetime cache of table_name -> full_schema payloads;
+        # parent tables recur across queries, so warm lookups skip Qdrant.
+        self._table_cache: Dict[str, Dict] = {}
+        # Whole-result cache keyed by query embedding similarity
+        self._semantic_cache = SemanticCache()
+
+    def invalidate_table_cache(self):
+        """Drops cached table schemas; call after re-ingesting a schema."""
+        self._table_cache.clear()
+        self._semantic_cache.clear()
+
+    async def _get_tables_by_names(self, table_names: List[str]) -> Dict[str, Dict]:
         """
-        Fetches the full table schema from Qdrant using a filter.
-        In a production environment, you might cache this in Redis.
+        Fetches the full schemas for several tables in ONE scroll call.
+        Replaces the per-table lookup that cost one round-trip for every
+        column hit whose parent table wasn't matched directly.
         """
-        result = qdrant_client.scroll(
+        if not table_names:
+            return {}
+
+        # Serve warm tables from the in-process cache, fetch only misses
+        found = {
+            name: self._table_cache[name]
+            for name in table_names if name in self._table_cache
+        }
+        misses = [name for name in table_names if name not in found]
+        if not misses:
+            return found
+
+        # models.Filter, not a raw dict: the gRPC transport only converts
+        # model instances; a dict goes straight into the protobuf
+        # constructor and raises before any I/O.
+        result = await async_client.scroll(
             collection_name=self.collection_name,
-            scroll_filter={
-                "must": [
-                    {"key": "type", "match": {"value": "table"}},
-                    {"key": "table_name", "match": {"value": table_name}}
-                ]
-            },
-            limit=1,
-            with_payload=True
+            scroll_filter=Filter(must=[
+                FieldCondition(key="type", match=MatchValue(value="table")),
+                FieldCondition(key="table_name", match=MatchAny(any=misses))
+            ]),
+            limit=len(misses),
+            # Only the two fields this method reads
+            with_payload=["table_name", "full_schema"]
         )
-        points = result[0]
-        return points[0].payload["full_schema"] if points else None
+        for point in result[0]:
+            schema = point.payload["full_schema"]
+            self._table_cache[point.payload["table_name"]] = schema
+            found[point.payload["table_name"]] = schema
+        return found
 
-    def retrieve_relevant_schema(self, user_query: str, top_k: int = 15) -> Dict[str, Any]:
+    async def retrieve_relevant_schema(self, user_query: str, top_k: int = 15) -> Dict[str, Any]:
         """
-        The core Hierarchical Retrieval logic.
+        The core Hierarchical Retrieval logic (async, gRPC transport).
         """
-        logger.info(f"🔍 Searching schema for: {user_query}")
-        
-        # 1. Vectorize the User Query
-        query_vector = self.model.encode(user_query).tolist()
+        logger.info("🔍 Searching schema for: %s", user_query)
+
+        # 1. Vectorize the User Query — through the micro-batcher so
+        #    concurrent requests share forward passes and the event loop
+        #    never blocks on the encode.
+        query_vector = await embedding_batcher.embed(user_query)
+
+        # 1b. Semantic cache: if a near-identical query was already
+        #     answered, reuse its formatted context and skip the search
+        #     and parent-table lookups entirely.
+        if settings.SCHEMA_SEMANTIC_CACHE:
+            cached = self._semantic_cache.lookup(query_vector)
+            if cached is not None:
+                logger.info("Semantic cache hit for: %s", user_query)
+                return cached
 
         # 2. Perform Search
-        search_results = qdrant_client.query_points(
+        search_results = await async_client.query_points(
             collection_name=self.collection_name,
             query=query_vector,
+            query_filter=self._type_filter,
             limit=top_k,
-            with_payload=True
+            # Only the fields the hit-processing below reads; the large
+            # schema_text/context_text strings stay server-side.
+            with_payload=["type", "table_name", "column_name", "full_schema"],
+            # Score candidates on int8 vectors, rescore winners on fp32.
+            # hnsw_ef=64: wide enough for solid recall at top_k=15 without
+            # walking the whole graph.
+            search_params=SearchParams(
+                hnsw_ef=64,
+                quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+            )
         )
 
         relevant_tables: Dict[str, Dict] = {}
         matched_columns: List[str] = []
+        missing_parents: Dict[str, None] = {}  # ordered set of parent tables to fetch
 
         # 3. Process results
         for hit in search_results.points:
@@ -57,17 +167,23 @@ class SchemaRetrievalService:
                 # If we hit a table directly, add its full schema
                 if t_name not in relevant_tables:
                     relevant_tables[t_name] = payload["full_schema"]
-            
+
             elif payload["type"] == "column":
-                # If we hit a column, we need to ensure its parent table is included
+                # If we hit a column, its parent table must be included;
+                # collect the name and fetch all parents in one batch below.
                 matched_columns.append(f"{t_name}.{payload['column_name']}")
                 if t_name not in relevant_tables:
-                    parent_schema = self._get_table_by_name(t_name)
-                    if parent_schema:
-                        relevant_tables[t_name] = parent_schema
+                    missing_parents[t_name] = None
+
+        # 3b. One batched lookup for every parent table still missing
+        missing = [t for t in missing_parents if t not in relevant_tables]
+        relevant_tables.update(await self._get_tables_by_names(missing))
 
         # 4. Format for LLM Prompt
-        return self._format_output_for_llm(relevant_tables, matched_columns)
+        result = self._format_output_for_llm(relevant_tables, matched_columns)
+        if settings.SCHEMA_SEMANTIC_CACHE:
+            self._semantic_cache.insert(query_vector, result)
+        return result
 
     def _format_output_for_llm(
         self,
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding.embedding import embedding_service
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-query embeddings into one forward pass.
+
+    Transformer throughput is far higher on batches than on single texts.
+    Under concurrent load, each request enqueues its text and awaits a
+    Future; a background task drains the queue (up to max_batch items,
+    waiting at most max_wait for stragglers) and runs one batch_embed
+    call for all of them.
+
+    Single-item batches fall back to embed_text so they still benefit
+    from the embedding LRU cache.
+    """
+
+    def __init__(self, max_batch: int = None, max_wait_ms: float = None):
+        self.max_batch = max_batch or settings.EMBEDDING_MICROBATCH_SIZE
+        self.max_wait = (max_wait_ms or settings.EMBEDDING_MICROBATCH_WAIT_MS) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text, sharing the forward pass with concurrent callers."""
+        if self._worker is None or self._worker.done():
+            self._start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    def _start(self):
+        # Lazily created so the batcher binds to the running event loop
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block until at least one request arrives
+            batch = [await self._queue.get()]
+
+            # Collect stragglers until the batch is full or the window closes
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                if len(batch) == 1:
+                    # Cached single-query path
+                    text, future = batch[0]
+                    vector = await asyncio.to_thread(embedding_service.embed_text, text)
+                    if not future.done():
+                        future.set_result(vector)
+                else:
+                    texts = [text for text, _ in batch]
+                    vectors = await asyncio.to_thread(embedding_service.batch_embed, texts)
+                    for (_, future), vector in zip(batch, vectors):
+                        if not future.done():
+                            future.set_result(vector)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+
+# ---------------------------------------------------------
+# SINGLETON INSTANCE
+# ---------------------------------------------------------
+embedding_batcher = EmbeddingBatcher()
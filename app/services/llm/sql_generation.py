@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict, Any, List
 from app.utils.logging_util import logger
 
@@ -6,6 +7,25 @@ from app.services.db_schema.schema_retrieval import schema_retrieval_service as
 from app.services.sql_intents.sql_intent_retrieval import intent_retrieval_service as intent_service
 from app.services.llm.strategies.llm_generation_strategy import LLMGenerationStrategy, GeminiStrategy, CustomAPIStrategy
 
+# Static prompt frame, built once at import. The per-request pieces
+# (schema lines, example lines) are formatted into {schema} / {examples};
+# everything else never changes, so it is not reassembled per query.
+PROMPT_TEMPLATE = """
+You are an expert SQL Generator for a PostgreSQL database.
+Your goal is to convert the user's natural language request into a valid, efficient SQL query.
+
+{schema}
+
+{examples}
+
+### RULES:
+1. **Scope:** Use ONLY the tables and columns defined in the schema above. Do not hallucinate table names.
+2. **Dialect:** Generate standard PostgreSQL syntax.
+3. **Format:** Return ONLY the raw SQL query. Do not include markdown formatting (like ```sql), comments, or explanations.
+4. **Relationships:** Pay attention to the 'FKs' (Foreign Keys) listed in the schema to join tables correctly.
+5. **Context:** Use the 'Similar Past Examples' to understand how to map vague terms to specific database columns.
+"""
+
 class SQLGenerationService:
     """
     Orchestrator class that:
@@ -20,12 +40,22 @@ class SQLGenerationService:
             "gemini": GeminiStrategy(),
             "custom": CustomAPIStrategy()
         }
+        # Formatted schema section keyed by the retrieved table names.
+        # Retrieval tends to surface the same table sets for related
+        # queries, so repeat hits reuse the string instead of re-walking
+        # the schema dict. Bounded; schemas only change on re-ingest.
+        self._schema_text_cache: Dict[tuple, str] = {}
+        self._schema_text_cache_capacity = 256
+
+    def invalidate_schema_cache(self):
+        """Drops cached formatted schema sections; call after re-ingestion."""
+        self._schema_text_cache.clear()
 
     async def generate_query(self, user_query: str, provider: str = "gemini") -> Dict[str, Any]:
         """
         Main entry point. Returns both the SQL and the context used (for debugging).
         """
-        logger.info(f"Generating SQL for query: '{user_query}' using provider: {provider}")
+        logger.info("Generating SQL for query: '%s' using provider: %s", user_query, provider)
 
         if provider not in self.strategies:
             raise ValueError(f"Unknown provider '{provider}'. Available: {list(self.strategies.keys())}")
@@ -33,9 +63,12 @@ class SQLGenerationService:
         strategy = self.strategies[provider]
 
         # 1. Gather Context
-        #    (We call the internal service methods directly)
-        schema_context = schema_service.retrieve_relevant_schema(user_query, top_k=15)
-        intent_matches = intent_service.get_top_intents(user_query, limit=5)
+        #    Schema retrieval and intent retrieval are independent, so run
+        #    them concurrently instead of paying both latencies in sequence.
+        schema_context, intent_matches = await asyncio.gather(
+            schema_service.retrieve_relevant_schema(user_query, top_k=15),
+            intent_service.get_top_intents(user_query, limit=5)
+        )
 
         # 2. Build the System Prompt
         #    (Logic moved here so Strategy is just an executor)
@@ -48,7 +81,7 @@ class SQLGenerationService:
         return {
             "sql": sql_query,
             "context": {
-                "schema_tables": [t.get('table_name') for t in schema_context.get('context', {}).get('tables', [])],
+                "schema_tables": [t.get('table_name') for t in schema_context.get('tables', [])],
                 "intents_found": len(intent_matches)
             }
         }
@@ -61,79 +94,88 @@ class SQLGenerationService:
         """
         Internal helper to format the system prompt.
         """
-        
+
         # --- PART A: SCHEMA FORMATTING ---
         # The schema_context comes from _format_output_for_llm
         # Structure: {"tables": [{"table_name": "...", "columns": [...], ...}]}
-        
-        schema_text = "### DATABASE SCHEMA (PostgreSQL)\n"
         tables = schema_context.get("tables", [])
 
-        if not tables:
-            schema_text += "No relevant tables found in context.\n"
-        else:
-            for table in tables:
-                t_name = table.get("table_name", "unknown")
-                description = table.get("description", "")
-                
-                # Format columns as "name (type)"
-                col_list = []
-                for col in table.get("columns", []):
-                    c_name = col.get("name")
-                    c_type = col.get("type")
-                    col_list.append(f"{c_name} ({c_type})")
-                
-                columns_str = ", ".join(col_list)
-                
-                # Format relationships if they exist
-                rels_str = ""
-                relationships = table.get("relationships", [])
-                if relationships:
-                    rel_parts = [f"{r['column']} -> {r['references_table']}" for r in relationships]
-                    rels_str = f" | FKs: {', '.join(rel_parts)}"
-
-                # Construct the line for this table
-                # e.g. - Table `users`: (id (int), name (text)) | FKs: role_id -> roles
-                schema_text += f"- Table `{t_name}`: ({columns_str}){rels_str}"
-                if description:
-                    schema_text += f" -- {description}"
-                schema_text += "\n"
+        # Retrieval often returns the same table set across related
+        # queries; reuse the formatted section instead of re-walking the
+        # dict. Keyed on the table names -- their schemas are stable for
+        # the life of the process.
+        cache_key = tuple(t.get("table_name") for t in tables)
+        schema_text = self._schema_text_cache.get(cache_key)
+        if schema_text is None:
+            schema_text = self._format_schema_section(tables)
+            if len(self._schema_text_cache) >= self._schema_text_cache_capacity:
+                self._schema_text_cache.clear()
+            self._schema_text_cache[cache_key] = schema_text
 
         # --- PART B: INTENT FORMATTING ---
-        examples_text = "### SIMILAR PAST EXAMPLES (Reference Only)\n"
-        
+        example_lines = ["### SIMILAR PAST EXAMPLES (Reference Only)"]
+
         if not intent_context:
-            examples_text += "No reference examples available.\n"
+            example_lines.append("No reference examples available.")
         else:
             for idx, intent in enumerate(intent_context):
                 # Unpack the payload wrapper from Qdrant response
                 payload = intent.get("payload", {})
-                
+
                 example_q = payload.get("text", "Unknown query")
                 operation = payload.get("operation", "SELECT")
                 category = payload.get("category", "General")
-                
-                examples_text += (
+
+                example_lines.append(
                     f"{idx+1}. User: '{example_q}'\n"
-                    f"   Intent: {category} ({operation})\n"
+                    f"   Intent: {category} ({operation})"
                 )
 
         # --- PART C: FINAL ASSEMBLY ---
-        prompt = f"""
-You are an expert SQL Generator for a PostgreSQL database.
-Your goal is to convert the user's natural language request into a valid, efficient SQL query.
+        # The static frame lives in PROMPT_TEMPLATE; only the dynamic
+        # sections are formatted in.
+        return PROMPT_TEMPLATE.format(
+            schema=schema_text,
+            examples="\n".join(example_lines) + "\n"
+        )
+
+    @staticmethod
+    def _format_schema_section(tables: List[Dict[str, Any]]) -> str:
+        """Formats the retrieved tables as the schema block of the prompt.
+
+        Lines are collected in a list and joined once; repeated `+=` on a
+        str re-copies the whole prompt per table (quadratic for wide
+        schemas).
+        """
+        schema_lines = ["### DATABASE SCHEMA (PostgreSQL)"]
 
-{schema_text}
+        if not tables:
+            schema_lines.append("No relevant tables found in context.")
+        else:
+            for table in tables:
+                t_name = table.get("table_name", "unknown")
+                description = table.get("description", "")
 
-{examples_text}
+                # Format columns as "name (type)"
+                columns_str = ", ".join(
+                    f"{col.get('name')} ({col.get('type')})"
+                    for col in table.get("columns", [])
+                )
 
-### RULES:
-1. **Scope:** Use ONLY the tables and columns defined in the schema above. Do not hallucinate table names.
-2. **Dialect:** Generate standard PostgreSQL syntax.
-3. **Format:** Return ONLY the raw SQL query. Do not include markdown formatting (like ```sql), comments, or explanations.
-4. **Relationships:** Pay attention to the 'FKs' (Foreign Keys) listed in the schema to join tables correctly.
-5. **Context:** Use the 'Similar Past Examples' to understand how to map vague terms to specific database columns.
-"""
-        return prompt
+                # Format relationships if they exist
+                rels_str = ""
+                relationships = table.get("relationships", [])
+                if relationships:
+                    rel_parts = [f"{r['column']} -> {r['references_table']}" for r in relationships]
+                    rels_str = f" | FKs: {', '.join(rel_parts)}"
+
+                # Construct the line for this table
+                # e.g. - Table `users`: (id (int), name (text)) | FKs: role_id -> roles
+                line = f"- Table `{t_name}`: ({columns_str}){rels_str}"
+                if description:
+                    line += f" -- {description}"
+                schema_lines.append(line)
+
+        return "\n".join(schema_lines) + "\n"
 # Singleton instance
-sql_generator = SQLGenerationService()
\ No newline at end of file
+sql_generator = SQLGenerationService()
@@ -1,6 +1,4 @@
 from abc import ABC, abstractmethod
-from google import genai
-from google.genai import types
 
 from app.utils.logging_util import logger
 from app.config import settings
@@ -23,9 +21,19 @@ class LLMGenerationStrategy(ABC):
 # ---------------------------------------------------------
 class GeminiStrategy(LLMGenerationStrategy):
     def __init__(self):
-        # Initialize the new GenAI SDK client
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        self.model_name = "gemini-2.5-flash" 
+        # The GenAI SDK client is created on first use (see .client):
+        # importing google.genai at module scope delays uvicorn readiness
+        # and costs RSS on workers that only serve the custom strategy.
+        self._client = None
+        self.model_name = "gemini-2.5-flash"
+
+    @property
+    def client(self):
+        """Lazily imports the SDK and builds the client on first call."""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        return self._client
 
     async def generate_sql(self, system_prompt: str, user_prompt: str) -> str:
         """
@@ -1,5 +1,5 @@
-from typing import Dict, Any, Optional, List
-from qdrant_client.models import PointStruct
+from typing import Dict, Any, Optional, List, Tuple
+from qdrant_client.models import PointStruct, OptimizersConfigDiff
 
 # ---------------------------------------------------------
 # CUSTOM LOGGER IMPORT
@@ -13,7 +13,7 @@ from app.definitions import SQL_INTENTS
 from app.config import settings
 from app.services.embedding.embedding import embedding_service
 from app.vectorstore.qdrant_client import client, ensure_collection
-from app.utils.idempotent_id import make_id
+from app.utils.idempotent_id import make_id_from_seed, make_seed
 
 
 class SQLIntentIngestionService:
@@ -95,87 +95,143 @@ class SQLIntentIngestionService:
         """
         self.logger.info("Starting SQL intent ingestion into Qdrant...")
 
-        # --- Step 1: Collect texts ---
-        all_texts = self._collect_all_texts()
-        self.logger.info(f"Collected {len(all_texts)} raw texts.")
+        # --- Step 1: Collect (intent, source, text) entries in ONE pass ---
+        entries = self._collect_entries()
+        self.logger.info("Collected %d raw texts.", len(entries))
 
         # --- Step 2: Deduplicate & Embed ---
-        unique_texts = list(set(all_texts))
-        self.logger.info(f"Generating embeddings for {len(unique_texts)} unique texts...")
+        # dict.fromkeys dedupes while preserving collection order, so texts
+        # of one intent stay contiguous for the embedding batches.
+        unique_texts = list(dict.fromkeys(text for _, _, text in entries))
+        self.logger.info("Generating embeddings for %d unique texts...", len(unique_texts))
 
         vectors = embedding_service.batch_embed(unique_texts)
 
-        if not vectors:
+        if len(vectors) == 0:
             self.logger.error("Embedding generation failed: no vectors returned.")
             return None
 
         # Map text -> vector for O(1) lookup
         text_vector_map = dict(zip(unique_texts, vectors))
-        self.logger.info(f"Embedding dimension: {len(vectors[0])}")
+        self.logger.info("Embedding dimension: %d", len(vectors[0]))
 
         # --- Step 3: Ensure Collection & Upsert ---
         ensure_collection()
-        
-        total_points = self._upsert_intents(text_vector_map)
+
+        # Defer HNSW indexing while bulk loading: incremental graph
+        # rebuilds per upsert are the main cost of Qdrant bulk ingestion.
+        # The index is built once in the background when re-enabled.
+        client.update_collection(
+            collection_name=settings.COLLECTION_NAME,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            total_points = self._upsert_intents(text_vector_map, entries)
+        finally:
+            client.update_collection(
+                collection_name=settings.COLLECTION_NAME,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=20000)
+            )
 
         # --- Step 4: Final Stats ---
-        self.logger.info("=== INGESTION COMPLETE ===")
-        self.logger.info(f"Intents: {len(SQL_INTENTS)} | Vectors: {total_points}")
+        # One structured record instead of a banner + stats pair: each
+        # record costs a format/dispatch/flush cycle in the handler.
+        self.logger.info(
+            "Ingestion complete | intents=%d vectors=%d",
+            len(SQL_INTENTS), total_points
+        )
 
         return {
             "intents": len(SQL_INTENTS),
             "vectors": total_points
         }
 
-    def _collect_all_texts(self) -> List[str]:
-        """Helper to gather all text variants from the intent definitions."""
-        texts = []
-        for intent in SQL_INTENTS:
-            texts.append(intent["text"])
-            texts.extend(intent.get("examples", []))
-            texts.extend(intent.get("paraphrases", []))
-            texts.extend(intent.get("keywords", []))
-        return texts
-
-    def _upsert_intents(self, text_vector_map: Dict[str, List[float]]) -> int:
-        """Helper to build points and upsert them into Qdrant."""
-        total_points = 0
-        
+    def _collect_entries(self) -> List[Tuple[Dict[str, Any], str, str]]:
+        """
+        Gathers every text variant as an (intent, source, text) triple.
+
+        A single traversal of SQL_INTENTS feeds both embedding and point
+        construction, instead of one pass to collect texts and a second
+        pass repeating the same .get() lookups to build points.
+        """
+        entries = []
         for intent in SQL_INTENTS:
-            points = []
-            intent_id = intent["id"]
-
-            # Nested helper to build a single point
-            def add_point(text_val, source_type):
-                nonlocal total_points
-                points.append(
-                    PointStruct(
-                        id=make_id(intent_id, source_type, text_val),
-                        vector=text_vector_map[text_val],
-                        payload={
-                            "intent_id": intent_id,
-                            "operation": intent["operation"],
-                            "category": intent["category"],
-                            "complexity": intent["complexity"],
-                            "source": source_type,
-                            "text": text_val
-                        }
-                    )
+            entries.append((intent, "description", intent["text"]))
+            for ex in intent.get("examples", []):
+                entries.append((intent, "example", ex))
+            for para in intent.get("paraphrases", []):
+                entries.append((intent, "paraphrase", para))
+            for kw in intent.get("keywords", []):
+                entries.append((intent, "keyword", kw))
+        return entries
+
+    def _upsert_intents(
+        self,
+        text_vector_map: Dict[str, List[float]],
+        entries: List[Tuple[Dict[str, Any], str, str]]
+    ) -> int:
+        """Helper to build points from prebuilt entries and stream them into Qdrant."""
+
+        # Deterministic ids computed up front, keeping the hash calls out
+        # of the upload loop. The intent prefix is hashed once per intent
+        # (entries are grouped by intent) and the seeded hasher is copied
+        # per point — same digests as make_id without re-formatting the
+        # whole key string per entry.
+        ids = []
+        seed_intent = None
+        seed = None
+        for intent, source, text in entries:
+            if intent is not seed_intent:
+                seed_intent = intent
+                seed = make_seed(intent["id"])
+            ids.append(make_id_from_seed(seed, source, text))
+
+        # Holds the final point so it can be replayed as a completion fence
+        last_point = []
+
+        def iter_points():
+            # Lazily built: only one network batch of PointStructs is alive
+            # at a time while upload_points drains the generator. The shared
+            # payload fields are assembled once per intent (entries are
+            # grouped by intent), not once per point.
+            base_intent = None
+            base = {}
+            for (intent, source, text), point_id in zip(entries, ids):
+                if intent is not base_intent:
+                    base_intent = intent
+                    base = {
+                        "intent_id": intent["id"],
+                        "operation": intent["operation"],
+                        "category": intent["category"],
+                        "complexity": intent["complexity"]
+                    }
+                point = PointStruct(
+                    id=point_id,
+                    vector=text_vector_map[text],
+                    payload={**base, "source": source, "text": text}
                 )
-                total_points += 1
-
-            # Build points
-            add_point(intent["text"], "description")
-            for ex in intent.get("examples", []): add_point(ex, "example")
-            for para in intent.get("paraphrases", []): add_point(para, "paraphrase")
-            for kw in intent.get("keywords", []): add_point(kw, "keyword")
-
-            # Upsert batch
+                last_point[:] = [point]
+                yield point
+
+        # One parallel upload instead of ~20 serialized per-intent upserts;
+        # the client slices the iterator into network batches internally.
+        # wait=False skips the per-batch WAL/consensus stall.
+        client.upload_points(
+            collection_name=settings.COLLECTION_NAME,
+            points=iter_points(),
+            batch_size=settings.INGEST_BATCH_SIZE,
+            parallel=settings.INGEST_PARALLEL,
+            wait=False
+        )
+
+        # Completion fence: replay the final point with wait=True. The ids
+        # are deterministic, so the duplicate write is a no-op that blocks
+        # until the queued batches are applied.
+        if last_point:
             client.upsert(
                 collection_name=settings.COLLECTION_NAME,
-                points=points
+                points=last_point,
+                wait=True
             )
-            # Typically debug logs are good for loops, so it doesn't flood INFO logs
-            self.logger.debug(f"Stored intent {intent_id} with {len(points)} vectors.")
-            
-        return total_points
+
+        return len(entries)
@@ -1,8 +1,128 @@
-from typing import List, Dict, Any
-from app.vectorstore.qdrant_client import client
+import asyncio
+import threading
+import time
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from qdrant_client.models import QueryRequest, SearchParams, QuantizationSearchParams
+
+from app.vectorstore.qdrant_client import client, async_client
 from app.config import settings
 from app.utils.logging_util import logger  # Using your centralized logger
+from app.services.embedding.batcher import embedding_batcher
 from app.services.embedding.embedding import embedding_service
+
+# ---------------------------------------------------------
+# VOTING WEIGHTS
+# ---------------------------------------------------------
+# Relative trust per text source when combining hit scores into a single
+# score per intent. Descriptions are the canonical definition; keywords
+# are short and ambiguous, so they contribute the least.
+# MappingProxyType keeps the shared mapping read-only.
+SOURCE_WEIGHTS = MappingProxyType({
+    "description": 1.0,
+    "example": 0.9,
+    "paraphrase": 0.8,
+    "keyword": 0.5,
+})
+DEFAULT_SOURCE_WEIGHT = 0.5
+
+# Payload fields actually consumed downstream (voting, IntentMatch, the
+# SQL-generation prompt). Everything else (complexity, ...) stays on the
+# server instead of riding along on every hit.
+INTENT_PAYLOAD_FIELDS = ["intent_id", "operation", "category", "source", "text"]
+
+
+class InMemoryIntentIndex:
+    """
+    In-process snapshot of the intent collection for brute-force search.
+
+    The intent corpus is only a few hundred vectors, so a single numpy
+    dot product over an (N x 384) matrix is cheaper than a network round
+    trip to Qdrant. Vectors are stored pre-normalized (see
+    EmbeddingService), so the dot product matches the collection's DOT
+    scores exactly.
+
+    The snapshot is scrolled from Qdrant lazily, refreshed after a TTL,
+    and disabled (callers fall back to Qdrant) if loading fails or the
+    collection outgrows max_points.
+    """
+
+    def __init__(self, max_points: int = None, ttl_seconds: int = None):
+        self.max_points = max_points or settings.INTENT_INMEMORY_MAX_POINTS
+        self.ttl = ttl_seconds or settings.INTENT_INMEMORY_TTL
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[Any] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self) -> bool:
+        """Loads/refreshes the snapshot. Returns True if it is usable."""
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.ttl:
+                return self._matrix is not None
+            try:
+                self._load()
+            except Exception:
+                logger.exception("In-memory intent index load failed; using Qdrant.")
+                self._matrix = None
+            self._loaded_at = time.monotonic()
+            return self._matrix is not None
+
+    def _load(self):
+        vectors = []
+        ids = []
+        payloads = []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=settings.COLLECTION_NAME,
+                limit=1024,
+                offset=offset,
+                with_payload=INTENT_PAYLOAD_FIELDS,
+                with_vectors=True
+            )
+            for point in points:
+                vectors.append(point.vector)
+                ids.append(point.id)
+                payloads.append(point.payload)
+            if len(vectors) > self.max_points:
+                logger.info(
+                    "Intent collection exceeds %d points; in-memory index disabled.",
+                    self.max_points
+                )
+                self._matrix = None
+                return
+            if offset is None:
+                break
+
+        if not vectors:
+            self._matrix = None
+            return
+
+        self._matrix = np.asarray(vectors, dtype=np.float32)
+        self._ids = ids
+        self._payloads = payloads
+        logger.info("In-memory intent index loaded: %d vectors.", len(ids))
+
+    def search(self, query_vector: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """Brute-force dot-product search over the snapshot."""
+        scores = self._matrix @ np.asarray(query_vector, dtype=np.float32)
+        limit = min(limit, scores.size)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "id": self._ids[i],
+                "score": round(float(scores[i]), 4),
+                "payload": self._payloads[i]
+            }
+            for i in top
+        ]
+
+
 class SQLIntentRetrievalService:
     """
     Service class to handle the retrieval (search) of SQL intents from Qdrant.
@@ -15,8 +135,9 @@ class SQLIntentRetrievalService:
 
     def __init__(self):
         self.logger = logger
+        self._memory_index = InMemoryIntentIndex()
 
-    def get_top_intents(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_top_intents(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Converts a natural language query into a vector and retrieves 
         the top N most similar intent definitions from Qdrant.
@@ -28,21 +149,38 @@ class SQLIntentRetrievalService:
         Returns:
             List[Dict[str, Any]]: A list of ranked search results with scores and metadata.
         """
-        self.logger.info(f"Performing direct search for: '{query}'")
+        self.logger.info("Performing direct search for: '%s'", query)
 
         try:
             # 1. Generate the embedding for the user query
             #    This converts text like "Show me users" into a vector [0.12, -0.98, ...]
-            query_vector = embedding_service.embed_text(query)
+            #    The batcher coalesces concurrent requests into one forward
+            #    pass and keeps the CPU-bound encode off the event loop.
+            query_vector = await embedding_batcher.embed(query)
 
-            # 2. Query Qdrant using the modern query_points API
+            # 2a. Small corpus: answer from the in-process snapshot and
+            #     skip the Qdrant round trip entirely
+            if settings.INTENT_INMEMORY_SEARCH:
+                usable = await asyncio.to_thread(self._memory_index.ensure_loaded)
+                if usable:
+                    results = self._memory_index.search(query_vector, limit)
+                    self.logger.info("Retrieved %d points from memory.", len(results))
+                    return results
+
+            # 2b. Query Qdrant using the modern query_points API
             #    We retrieve only the payload (metadata) and not the vectors themselves
-            response = client.query_points(
+            response = await async_client.query_points(
                 collection_name=settings.COLLECTION_NAME,
                 query=query_vector,
                 limit=limit,
-                with_payload=True,
-                with_vectors=False
+                with_payload=INTENT_PAYLOAD_FIELDS,
+                with_vectors=False,
+                # Score candidates on int8 vectors, rescore winners on fp32.
+                # hnsw_ef=64 keeps recall high without walking the graph.
+                search_params=SearchParams(
+                    hnsw_ef=64,
+                    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+                )
             )
 
             # 3. Format the results for readability
@@ -55,14 +193,125 @@ class SQLIntentRetrievalService:
                     "payload": hit.payload
                 })
 
-            self.logger.info(f"Successfully retrieved {len(results)} points.")
+            self.logger.info("Successfully retrieved %d points.", len(results))
             return results
 
         except Exception as e:
             # Log the full stack trace for debugging
-            self.logger.exception(f"Search failed for query '{query}'")
+            self.logger.exception("Search failed for query '%s'", query)
+            return []
+
+    async def get_top_intents_batch(
+        self, queries: List[str], limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batched variant of get_top_intents for multi-query callers.
+
+        All queries are embedded in one forward pass, and when the
+        in-memory snapshot is unavailable they are searched with a single
+        query_batch_points round-trip instead of one RTT per query.
+
+        Returns:
+            One ranked hit list per input query, in input order.
+        """
+        if not queries:
             return []
 
+        try:
+            vectors = await asyncio.to_thread(embedding_service.batch_embed, queries)
+
+            if settings.INTENT_INMEMORY_SEARCH:
+                usable = await asyncio.to_thread(self._memory_index.ensure_loaded)
+                if usable:
+                    return [self._memory_index.search(v, limit) for v in vectors]
+
+            requests = [
+                QueryRequest(
+                    query=vector.tolist(),
+                    limit=limit,
+                    with_payload=INTENT_PAYLOAD_FIELDS,
+                    with_vector=False,
+                    params=SearchParams(
+                        hnsw_ef=64,
+                        quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+                    )
+                )
+                for vector in vectors
+            ]
+            responses = await async_client.query_batch_points(
+                collection_name=settings.COLLECTION_NAME,
+                requests=requests
+            )
+
+            results = [
+                [
+                    {"id": hit.id, "score": round(hit.score, 4), "payload": hit.payload}
+                    for hit in response.points
+                ]
+                for response in responses
+            ]
+            self.logger.info("Batch search answered %d queries.", len(results))
+            return results
+
+        except Exception:
+            self.logger.exception("Batch search failed for %d queries", len(queries))
+            return [[] for _ in queries]
+
+    def aggregate_intent_scores(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Combines per-text hits into one ranked entry per intent (voting).
+
+        A single intent is stored as many vectors (description, examples,
+        paraphrases, keywords), so a search can return several hits for the
+        same intent. The per-intent score is the source-weighted mean of its
+        hit scores, computed with numpy (np.bincount) instead of a Python
+        accumulation loop. The confidence threshold is applied in the same
+        pass rather than as a separate post-processing step.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per intent clearing
+            INTENT_CONFIDENCE_THRESHOLD, sorted by score descending, each
+            carrying the payload of its best-scoring hit.
+        """
+        if not hits:
+            return []
+
+        ids = np.fromiter(
+            (int(h["payload"].get("intent_id", -1)) for h in hits), dtype=np.int64
+        )
+        scores = np.fromiter((h["score"] for h in hits), dtype=np.float32)
+        weights = np.fromiter(
+            (SOURCE_WEIGHTS.get(h["payload"].get("source"), DEFAULT_SOURCE_WEIGHT)
+             for h in hits),
+            dtype=np.float32
+        )
+
+        # Compact intent ids to 0..K-1 so bincount stays dense
+        unique_ids, compact = np.unique(ids, return_inverse=True)
+        weighted_sum = np.bincount(compact, weights=scores * weights)
+        weight_sum = np.bincount(compact, weights=weights)
+        aggregated = weighted_sum / weight_sum
+
+        # Keep the best-scoring hit per intent as its representative payload
+        best_hit: Dict[int, Dict[str, Any]] = {}
+        for hit in hits:
+            intent_id = int(hit["payload"].get("intent_id", -1))
+            if intent_id not in best_hit:
+                best_hit[intent_id] = hit  # hits arrive sorted by score
+
+        ranked_positions = np.argsort(aggregated)[::-1]
+        threshold = settings.INTENT_CONFIDENCE_THRESHOLD
+        if threshold > 0.0:
+            ranked_positions = ranked_positions[aggregated[ranked_positions] >= threshold]
+        return [
+            {
+                "intent_id": int(unique_ids[pos]),
+                "score": round(float(aggregated[pos]), 4),
+                "payload": best_hit[int(unique_ids[pos])]["payload"]
+            }
+            for pos in ranked_positions
+        ]
+
 # ---------------------------------------------------------
 # SINGLETON INSTANCE
 # ---------------------------------------------------------
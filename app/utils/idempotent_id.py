@@ -1,5 +1,33 @@
 import hashlib
 
+# 8-byte digests: ids fit Qdrant's native unsigned-64-bit numeric point
+# ids, which cost fewer bytes on the wire and skip server-side UUID
+# parsing compared to 32-char hex strings. Collision odds stay
+# negligible for corpora this size (~2^32 points to reach 50%).
+_DIGEST_SIZE = 8
+
 def make_id(intent_id, source, text):
+    # blake2b instead of md5: several times faster on the short strings
+    # ingestion hashes per point.
+    # NOTE: ids changed when this moved off md5 hex — recreate the intent
+    # collection (or tolerate orphaned old-id points) when upgrading.
     raw = f"{intent_id}:{source}:{text}"
-    return hashlib.md5(raw.encode()).hexdigest()
\ No newline at end of file
+    digest = hashlib.blake2b(raw.encode(), digest_size=_DIGEST_SIZE).digest()
+    return int.from_bytes(digest, "big")
+
+def make_seed(intent_id):
+    """
+    Hasher pre-loaded with the intent prefix.
+
+    Entries arrive grouped by intent, so bulk ingestion hashes the
+    "{intent_id}:" prefix once per intent and copy()s the hasher per
+    point, instead of re-formatting and re-hashing the full key string
+    for every entry. Ids are identical to make_id's.
+    """
+    return hashlib.blake2b(f"{intent_id}:".encode(), digest_size=_DIGEST_SIZE)
+
+def make_id_from_seed(seed, source, text):
+    """Completes a make_seed() hasher for one (source, text) pair."""
+    h = seed.copy()
+    h.update(f"{source}:{text}".encode())
+    return int.from_bytes(h.digest(), "big")
@@ -1,7 +1,13 @@
 import re
 
+# Compiled once at import. normalize() runs on every embedding call
+# (queries and ingestion texts), so we skip the re-module cache lookup
+# that re.sub pays on every invocation.
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
 def normalize(text: str) -> str:
     text = text.lower().strip()
-    text = re.sub(r"[^\w\s]", "", text)
-    text = re.sub(r"\s+", " ", text)
+    text = _PUNCTUATION_RE.sub("", text)
+    text = _WHITESPACE_RE.sub(" ", text)
     return text
@@ -0,0 +1,32 @@
+from app.definitions import SQL_INTENTS
+from app.utils.idempotent_id import make_id, make_id_from_seed, make_seed
+
+
+def _all_triples():
+    """Every (intent_id, source, text) triple ingestion would hash."""
+    for intent in SQL_INTENTS:
+        yield intent["id"], "description", intent["text"]
+        for ex in intent.get("examples", []):
+            yield intent["id"], "example", ex
+        for para in intent.get("paraphrases", []):
+            yield intent["id"], "paraphrase", para
+        for kw in intent.get("keywords", []):
+            yield intent["id"], "keyword", kw
+
+
+def test_ids_are_deterministic():
+    assert make_id(101, "keyword", "show") == make_id(101, "keyword", "show")
+
+
+def test_seeded_ids_match_make_id():
+    """The prefix-seeded bulk path must produce make_id's digests."""
+    for intent_id, source, text in _all_triples():
+        seed = make_seed(intent_id)
+        assert make_id_from_seed(seed, source, text) == make_id(intent_id, source, text)
+
+
+def test_no_collisions_across_registry():
+    """Distinct (intent, source, text) triples must map to distinct ids."""
+    triples = set(_all_triples())
+    ids = {make_id(*triple) for triple in triples}
+    assert len(ids) == len(triples)
@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+from qdrant_client.models import Filter
+
+import app.services.db_schema.schema_retrieval as schema_retrieval
+from app.services.db_schema.schema_retrieval import SchemaRetrievalService
+
+
+class FakeAsyncClient:
+    """Records scroll calls and serves canned parent-table points."""
+
+    def __init__(self, schemas_by_table):
+        self.schemas_by_table = schemas_by_table
+        self.scroll_calls = []
+
+    async def scroll(self, collection_name, scroll_filter, limit, with_payload):
+        self.scroll_calls.append(scroll_filter)
+        points = [
+            SimpleNamespace(payload={"table_name": name, "full_schema": schema})
+            for name, schema in self.schemas_by_table.items()
+        ]
+        return points, None
+
+
+def test_parent_table_miss_path_uses_model_filter(monkeypatch):
+    """The batched lookup must send a models.Filter — raw dicts break gRPC."""
+    fake = FakeAsyncClient({"users": {"description": "", "columns": []}})
+    monkeypatch.setattr(schema_retrieval, "async_client", fake)
+    service = SchemaRetrievalService()
+
+    found = asyncio.run(service._get_tables_by_names(["users"]))
+
+    assert found == {"users": {"description": "", "columns": []}}
+    assert len(fake.scroll_calls) == 1
+    assert isinstance(fake.scroll_calls[0], Filter)
+
+
+def test_parent_table_cache_skips_scroll(monkeypatch):
+    """Warm tables come from the in-process cache without another scroll."""
+    fake = FakeAsyncClient({"users": {"description": "", "columns": []}})
+    monkeypatch.setattr(schema_retrieval, "async_client", fake)
+    service = SchemaRetrievalService()
+
+    asyncio.run(service._get_tables_by_names(["users"]))
+    asyncio.run(service._get_tables_by_names(["users"]))
+
+    assert len(fake.scroll_calls) == 1